@@ -3,26 +3,48 @@ Data Preprocessing Script
 Task 1: Data Preprocessing
 
 Cleans and preprocesses the scraped reviews data:
-- Removes duplicates
-- Handles missing data  
+- Removes duplicates, handles missing data and cleans text in one pass
 - Normalizes dates
-- Cleans text data
 - Saves processed data
 """
 
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import re
 import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.csv_io import read_csv_arrow, write_csv_arrow
+
+# Whitespace runs collapsed during text cleaning. Passed as a plain string so pandas keeps
+# the Arrow regex kernel; a compiled pattern drops to the per-row object path
+_WS_PATTERN = r'\s+'
+
+# Rows missing any of these are dropped
+CRITICAL_COLUMNS = ['review', 'rating', 'bank']
+
+# Columns written by the scraper and the dtypes they are parsed with
+RAW_COLUMNS = ['review', 'rating', 'date', 'bank', 'source']
+RAW_DTYPES = {
+    'review': 'string[pyarrow]',
+    'rating': 'Int8',
+    'date': 'string',
+    'bank': 'category',
+    'source': 'string'
+}
 
 class ReviewPreprocessor:
     """Preprocessor for bank review data"""
     
     def __init__(self, input_path='data/raw/bank_reviews.csv', 
-                 output_path='data/processed/bank_reviews_cleaned.csv'):
+                 output_path='data/processed/bank_reviews_cleaned.csv',
+                 chunksize=None):
         self.input_path = input_path
         self.output_path = output_path
+        self.chunksize = chunksize  # Stream large dumps in chunks of this many rows
         self.df = None
         self.stats = {}
     
@@ -30,111 +52,120 @@ class ReviewPreprocessor:
         """Load the raw reviews data"""
         print("Loading raw data...")
         try:
-            self.df = pd.read_csv(self.input_path)
-            print(f"✓ Loaded {len(self.df)} reviews")
-            self.stats['original_count'] = len(self.df)
+            # Explicit dtypes skip type inference; review text is kept in
+            # Arrow-backed columnar storage instead of one boxed str per row
+            if self.chunksize:
+                # Drop duplicates chunk by chunk so repeated reviews never
+                # accumulate in memory; clean_reviews catches the rest
+                chunks = []
+                original_count = 0
+                duplicates_removed = 0
+                reader = pd.read_csv(self.input_path, usecols=RAW_COLUMNS, dtype=RAW_DTYPES,
+                                     engine='c', chunksize=self.chunksize)
+                for chunk in reader:
+                    original_count += len(chunk)
+                    deduped = chunk.drop_duplicates(subset=['review'], keep='first')
+                    duplicates_removed += len(chunk) - len(deduped)
+                    chunks.append(deduped)
+                self.df = pd.concat(chunks, ignore_index=True)
+                self.stats['chunk_duplicates_removed'] = duplicates_removed
+            else:
+                self.df = read_csv_arrow(self.input_path, RAW_COLUMNS, RAW_DTYPES)
+                original_count = len(self.df)
+            
+            print(f"✓ Loaded {original_count} reviews")
+            self.stats['original_count'] = original_count
             return True
         except Exception as e:
             print(f"✗ Error loading data: {e}")
             return False
     
-    def remove_duplicates(self):
-        """Remove duplicate reviews"""
-        print("\n[1/5] Removing duplicates...")
-        before = len(self.df)
-        self.df = self.df.drop_duplicates(subset=['review'], keep='first')
-        after = len(self.df)
-        removed = before - after
-        print(f"✓ Removed {removed} duplicate reviews")
-        self.stats['duplicates_removed'] = removed
-    
-    def handle_missing_data(self):
-        """Handle missing values"""
-        print("\n[2/5] Handling missing data...")
+    def clean_reviews(self):
+        """Remove duplicates, handle missing data and clean text in one pass"""
+        print("\n[1/3] Cleaning reviews...")
         
-        # Check missing values before
-        missing_before = self.df.isnull().sum()
-        print("Missing values before cleaning:")
-        for col, count in missing_before.items():
-            if count > 0:
-                print(f"  {col}: {count}")
+        # Build a single keep-mask so the frame is only rewritten once
+        unique = ~self.df.duplicated(subset=['review'], keep='first')
+        complete = self.df[CRITICAL_COLUMNS].notna().all(axis=1)
         
-        # Remove rows with missing critical data
-        critical_cols = ['review', 'rating', 'bank']
-        self.df = self.df.dropna(subset=critical_cols)
+        # Check missing values before (among non-duplicate reviews)
+        missing_before = self.df.isnull()[unique].sum()
+        print("Missing values before cleaning:")
+        self._print_nonzero(missing_before)
         
         # Fill other missing values
         self.df['date'] = self.df['date'].fillna(datetime.now().strftime('%Y-%m-%d'))
         self.df['source'] = self.df['source'].fillna('Google Play Store')
+        self._optimize_dtypes()
+        
+        # Collapse whitespace and strip using vectorized string ops
+        reviews = self.df['review'].fillna('').astype('string[pyarrow]')
+        self.df['review_cleaned'] = reviews.str.replace(_WS_PATTERN, ' ', regex=True).str.strip()
+        non_empty = self.df['review_cleaned'].str.len() > 0
+        
+        self.df = self.df.loc[unique & complete & non_empty]
         
         # Check missing values after
         missing_after = self.df.isnull().sum()
         print("Missing values after cleaning:")
-        for col, count in missing_after.items():
-            if count > 0:
-                print(f"  {col}: {count}")
+        self._print_nonzero(missing_after)
+        
+        duplicates_removed = int((~unique).sum()) + self.stats.get('chunk_duplicates_removed', 0)
+        empty_removed = int((unique & complete & ~non_empty).sum())
+        
+        print(f"✓ Removed {duplicates_removed} duplicate reviews")
+        print(f"✓ Cleaned text data")
+        if empty_removed > 0:
+            print(f"✓ Removed {empty_removed} empty reviews")
         
+        self.stats['duplicates_removed'] = duplicates_removed
         self.stats['missing_handled'] = missing_before.sum() - missing_after.sum()
+        self.stats['empty_reviews_removed'] = empty_removed
+    
+    def _optimize_dtypes(self):
+        """Store low-cardinality columns compactly as categoricals"""
+        for col in ('bank', 'source'):
+            self.df[col] = self.df[col].astype('category')
+    
+    @staticmethod
+    def _print_nonzero(counts):
+        """Print the non-zero entries of a per-column count Series"""
+        nonzero = counts[counts > 0]
+        if not nonzero.empty:
+            print('  ' + nonzero.to_string().replace('\n', '\n  '))
     
     def normalize_dates(self):
         """Normalize date formats to YYYY-MM-DD"""
-        print("\n[3/5] Normalizing dates...")
+        print("\n[2/3] Normalizing dates...")
         
         try:
-            # Convert to datetime and format
-            self.df['date'] = pd.to_datetime(self.df['date']).dt.strftime('%Y-%m-%d')
-            print(f"✓ Dates normalized to YYYY-MM-DD format")
+            # Parse once and derive every date column from the same result
+            dates = pd.to_datetime(self.df['date'], errors='coerce', format='mixed')
             
             # Add year and month columns for analysis
-            self.df['review_year'] = pd.to_datetime(self.df['date']).dt.year
-            self.df['review_month'] = pd.to_datetime(self.df['date']).dt.month
+            self.df['review_year'] = dates.dt.year.astype('Int16')
+            self.df['review_month'] = dates.dt.month.astype('Int8')
+            
+            self.df['date'] = dates.dt.strftime('%Y-%m-%d')
+            print(f"✓ Dates normalized to YYYY-MM-DD format")
             
         except Exception as e:
             print(f"✗ Error normalizing dates: {e}")
     
-    def clean_text(self):
-        """Clean review text"""
-        print("\n[4/5] Cleaning text data...")
-        
-        def clean_text_content(text):
-            """Clean individual review text"""
-            if pd.isna(text):
-                return ""
-            
-            text = str(text)
-            # Remove extra whitespace
-            text = re.sub(r'\s+', ' ', text)
-            # Remove leading/trailing whitespace
-            text = text.strip()
-            return text
-        
-        # Apply cleaning
-        self.df['review_cleaned'] = self.df['review'].apply(clean_text_content)
-        
-        # Remove empty reviews after cleaning
-        before = len(self.df)
-        self.df = self.df[self.df['review_cleaned'].str.len() > 0]
-        after = len(self.df)
-        empty_removed = before - after
-        
-        print(f"✓ Cleaned text data")
-        if empty_removed > 0:
-            print(f"✓ Removed {empty_removed} empty reviews")
-        
-        self.stats['empty_reviews_removed'] = empty_removed
-    
     def validate_data(self):
         """Validate data quality"""
-        print("\n[5/5] Validating data...")
+        print("\n[3/3] Validating data...")
         
         # Validate ratings (should be 1-5)
-        invalid_ratings = self.df[~self.df['rating'].between(1, 5)]
-        if len(invalid_ratings) > 0:
-            print(f"⚠ Found {len(invalid_ratings)} invalid ratings")
-            self.df = self.df[self.df['rating'].between(1, 5)]
+        ratings = self.df['rating'].to_numpy(dtype=np.int8, copy=False)
+        valid = (ratings >= 1) & (ratings <= 5)
+        invalid_count = len(valid) - np.count_nonzero(valid)
+        if invalid_count > 0:
+            print(f"⚠ Found {invalid_count} invalid ratings")
+            self.df = self.df[valid]
         
         # Check final data quality
-        missing_final = self.df.isnull().sum().sum()
+        missing_final = self.df.isna().values.sum()
         if missing_final == 0:
             print("✓ No missing data in final dataset")
         else:
@@ -151,7 +182,7 @@ class ReviewPreprocessor:
         os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
         
         # Save to CSV
-        self.df.to_csv(self.output_path, index=False)
+        write_csv_arrow(self.df, self.output_path)
         print(f"✓ Processed data saved to: {self.output_path}")
         
         return True
@@ -178,16 +209,19 @@ class ReviewPreprocessor:
             else:
                 print("⚠ Data quality: Needs attention")
         
+        # One grouped pass; both summaries come from the small pivot
+        pivot = self.df.groupby(['bank', 'rating'], observed=True).size().unstack(fill_value=0)
+        
         print(f"\nReviews per bank:")
-        bank_counts = self.df['bank'].value_counts()
-        for bank, count in bank_counts.items():
-            print(f"  {bank}: {count}")
+        bank_counts = pivot.sum(axis=1).sort_values(ascending=False)
+        print('  ' + bank_counts.to_string(header=False).replace('\n', '\n  '))
         
         print(f"\nRating distribution:")
-        rating_counts = self.df['rating'].value_counts().sort_index(ascending=False)
-        for rating, count in rating_counts.items():
-            pct = (count / len(self.df)) * 100
-            print(f"  {'⭐' * int(rating)}: {count} ({pct:.1f}%)")
+        rating_counts = pivot.sum(axis=0).sort_index(ascending=False)
+        rating_pcts = rating_counts / len(self.df) * 100
+        stars = ['⭐' * int(rating) for rating in rating_counts.index]
+        for star, count, pct in zip(stars, rating_counts, rating_pcts):
+            print(f"  {star}: {count} ({pct:.1f}%)")
     
     def process(self):
         """Run complete preprocessing pipeline"""
@@ -197,10 +231,8 @@ class ReviewPreprocessor:
         if not self.load_data():
             return False
         
-        self.remove_duplicates()
-        self.handle_missing_data()
+        self.clean_reviews()
         self.normalize_dates()
-        self.clean_text()
         self.validate_data()
         
         if self.save_data():
@@ -10,7 +10,7 @@ Scrapes reviews for three Ethiopian banks:
 
 import pandas as pd
 from google_play_scraper import reviews, Sort
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
 
@@ -45,16 +45,17 @@ def scrape_bank_reviews(app_id, bank_name, count=450):
             filter_score_with=None  # Get all ratings (1-5 stars)
         )
         
-        # Convert to required format
-        reviews_list = []
-        for review in result:
-            reviews_list.append({
+        # Convert to required format; dates are formatted once per DataFrame in main()
+        reviews_list = [
+            {
                 'review': review['content'],
                 'rating': review['score'],
-                'date': review['at'].strftime('%Y-%m-%d'),  # Format as YYYY-MM-DD
+                'date': review['at'],
                 'bank': bank_name,
                 'source': 'Google Play Store'
-            })
+            }
+            for review in result
+        ]
         
         print(f"✓ Collected {len(reviews_list)} reviews for {bank_name}")
         return reviews_list
@@ -72,19 +73,21 @@ def main():
     
     all_reviews = []
     
-    # Scrape each bank
-    for bank_code, app_id in BANK_APPS.items():
-        bank_name = BANK_NAMES[bank_code]
+    # Scrape all banks concurrently; each call is network-bound
+    with ThreadPoolExecutor(max_workers=len(BANK_APPS)) as executor:
+        futures = {
+            bank_code: executor.submit(scrape_bank_reviews, app_id, BANK_NAMES[bank_code], 450)
+            for bank_code, app_id in BANK_APPS.items()
+        }
         
-        reviews_data = scrape_bank_reviews(app_id, bank_name, 450)
-        all_reviews.extend(reviews_data)
-        
-        # Be polite - wait between requests
-        time.sleep(2)
+        # Collect in BANK_APPS order so the output CSV is deterministic
+        for future in futures.values():
+            all_reviews.extend(future.result())
     
     # Create DataFrame
     if all_reviews:
         df = pd.DataFrame(all_reviews)
+        df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')  # Format as YYYY-MM-DD
         
         # Create data directory if it doesn't exist
         os.makedirs('data/raw', exist_ok=True)
@@ -4,8 +4,10 @@ PostgreSQL Database Manager for Bank Reviews
 
 import pandas as pd
 import psycopg2
-from psycopg2.extras import execute_batch
+from psycopg2.extras import execute_values
 from typing import Dict, List, Optional
+import csv
+import io
 import os
 import sys
 from dotenv import load_dotenv
@@ -16,6 +18,19 @@ load_dotenv()
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from utils.csv_io import read_csv_arrow
+
+# Analysis CSV columns needed for the reviews table and their parse dtypes
+REVIEW_DTYPES = {
+    'bank': 'category',
+    'review_text': 'string',
+    'rating': 'int8',
+    'date': 'string',
+    'sentiment_label': 'category',
+    'sentiment_score': 'float32',
+    'source': 'category'
+}
+
 class DatabaseManager:
     """Manages PostgreSQL database operations for bank reviews"""
     
@@ -32,6 +47,7 @@ class DatabaseManager:
         }
         self.conn = None
         self.cursor = None
+        self.bank_ids = {}  # bank_name -> bank_id for every bank in the table, set by insert_banks
         
     def connect(self) -> bool:
         """Establish database connection"""
@@ -42,6 +58,13 @@ class DatabaseManager:
             
             self.conn = psycopg2.connect(**self.connection_params)
             self.cursor = self.conn.cursor()
+            
+            # Analytics loads can be replayed from CSV, so skip waiting on
+            # the WAL fsync at commit and give sorts/hashes more memory
+            self.cursor.execute("SET synchronous_commit = off;")
+            self.cursor.execute("SET work_mem = '256MB';")
+            self.conn.commit()
+            
             print(" Connected to PostgreSQL database successfully!")
             return True
         except Exception as e:
@@ -58,29 +81,43 @@ class DatabaseManager:
             self.conn.close()
         print(" Database connection closed.")
     
-    def insert_banks(self, banks_data: List[Dict]) -> int:
+    def insert_banks(self, banks_data: List[Dict], commit: bool = True) -> int:
         """Insert banks data into banks table"""
         if not self.conn:
             print(" Not connected to database")
             return 0
         
+        # DO NOTHING leaves existing banks untouched; the CTE returns the new ids plus
+        # every bank already in the table in one round-trip. The final SELECT reads
+        # the pre-insert snapshot, so new banks come only from ins.
         insert_query = """
-        INSERT INTO banks (bank_name, app_name) 
-        VALUES (%s, %s)
-        ON CONFLICT (bank_name) DO NOTHING
-        RETURNING bank_id;
+        WITH new_banks (bank_name, app_name) AS (VALUES %s),
+        ins AS (
+            INSERT INTO banks (bank_name, app_name)
+            SELECT bank_name, app_name FROM new_banks
+            ON CONFLICT (bank_name) DO NOTHING
+            RETURNING bank_id, bank_name
+        )
+        SELECT bank_id, bank_name, true AS inserted FROM ins
+        UNION ALL
+        SELECT bank_id, bank_name, false FROM banks;
         """
         
         try:
-            inserted_count = 0
+            rows = execute_values(
+                self.cursor,
+                insert_query,
+                [(bank['bank_name'], bank['app_name']) for bank in banks_data],
+                fetch=True
+            )
+            
+            self.bank_ids = {bank_name: bank_id for bank_id, bank_name, _ in rows}
             for bank in banks_data:
-                self.cursor.execute(insert_query, (bank['bank_name'], bank['app_name']))
-                result = self.cursor.fetchone()
-                if result:
-                    bank['bank_id'] = result[0]  # Store the generated bank_id
-                    inserted_count += 1
+                bank['bank_id'] = self.bank_ids.get(bank['bank_name'])  # Store the bank_id
+            inserted_count = sum(1 for _, _, inserted in rows if inserted)
             
-            self.conn.commit()
+            if commit:
+                self.conn.commit()
             print(f" Inserted {inserted_count} banks")
             return inserted_count
             
@@ -89,7 +126,34 @@ class DatabaseManager:
             print(f" Error inserting banks: {e}")
             return 0
     
-    def insert_reviews(self, reviews_data: List[Dict], bank_mapping: Dict[str, int]) -> int:
+    @staticmethod
+    def _prepare_reviews(reviews_data: pd.DataFrame, bank_mapping: Dict[str, int]) -> List[tuple]:
+        """Build reviews table rows, skipping reviews for unknown banks"""
+        if not isinstance(reviews_data, pd.DataFrame):
+            reviews_data = pd.DataFrame(reviews_data)
+        
+        bank_ids = reviews_data['bank'].map(bank_mapping)
+        known = bank_ids.notna()
+        if not known.all():
+            unknown = sorted(reviews_data.loc[~known, 'bank'].astype(str).unique())
+            print(f" ⚠ Skipping {int((~known).sum())} reviews for banks not in the database: {unknown}")
+        reviews = reviews_data[known]
+        
+        prepared = pd.DataFrame({
+            'bank_id': bank_ids[known].astype('int64'),
+            'review_text': reviews['review_text'].str.slice(0, 10000),  # Limit text length
+            'rating': reviews['rating'],
+            'review_date': reviews['date'],
+            'sentiment_label': reviews['sentiment_label'],
+            'sentiment_score': reviews['sentiment_score'],
+            'source': reviews['source'] if 'source' in reviews else 'Google Play Store'
+        })
+        
+        # Missing values (pd.NA, NaN) become None: NULL for execute_values, an empty field for COPY
+        prepared = prepared.astype(object).where(prepared.notna(), None)
+        return list(prepared.itertuples(index=False, name=None))
+    
+    def insert_reviews(self, reviews_data: pd.DataFrame, bank_mapping: Dict[str, int], commit: bool = True) -> int:
         """Insert reviews data into reviews table"""
         if not self.conn:
             print(" Not connected to database")
@@ -98,29 +162,18 @@ class DatabaseManager:
         insert_query = """
         INSERT INTO reviews 
         (bank_id, review_text, rating, review_date, sentiment_label, sentiment_score, source)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        VALUES %s
         ON CONFLICT DO NOTHING;
         """
         
         # Prepare data for insertion
-        prepared_data = []
-        for review in reviews_data:
-            bank_name = review['bank']
-            if bank_name in bank_mapping:
-                prepared_data.append((
-                    bank_mapping[bank_name],  # bank_id
-                    review['review_text'][:10000],  # Limit text length
-                    review['rating'],
-                    review['date'],
-                    review['sentiment_label'],
-                    review['sentiment_score'],
-                    review.get('source', 'Google Play Store')
-                ))
+        prepared_data = self._prepare_reviews(reviews_data, bank_mapping)
         
         try:
-            # Use execute_batch for efficient bulk insertion
-            execute_batch(self.cursor, insert_query, prepared_data)
-            self.conn.commit()
+            # Use execute_values to send multi-row INSERTs, parsed once per page
+            execute_values(self.cursor, insert_query, prepared_data, page_size=1000)
+            if commit:
+                self.conn.commit()
             
             inserted_count = len(prepared_data)
             print(f" Inserted {inserted_count} reviews")
@@ -131,13 +184,66 @@ class DatabaseManager:
             print(f" Error inserting reviews: {e}")
             return 0
     
+    def copy_reviews(self, reviews_data: pd.DataFrame, bank_mapping: Dict[str, int], commit: bool = True) -> int:
+        """Bulk load reviews with COPY via a staging table"""
+        if not self.conn:
+            print(" Not connected to database")
+            return 0
+        
+        prepared_data = self._prepare_reviews(reviews_data, bank_mapping)
+        
+        # Serialize rows to an in-memory CSV; empty fields load as NULL
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(prepared_data)
+        buffer.seek(0)
+        
+        try:
+            # COPY skips per-row parse/plan; the staging table keeps the
+            # ON CONFLICT semantics of insert_reviews
+            self.cursor.execute("""
+            CREATE TEMP TABLE reviews_staging ON COMMIT DROP AS
+            SELECT bank_id, review_text, rating, review_date,
+                   sentiment_label, sentiment_score, source
+            FROM reviews WITH NO DATA;
+            """)
+            self.cursor.copy_expert(
+                "COPY reviews_staging (bank_id, review_text, rating, review_date, "
+                "sentiment_label, sentiment_score, source) FROM STDIN WITH CSV",
+                buffer
+            )
+            self.cursor.execute("""
+            INSERT INTO reviews 
+            (bank_id, review_text, rating, review_date, sentiment_label, sentiment_score, source)
+            SELECT bank_id, review_text, rating, review_date, sentiment_label, sentiment_score, source
+            FROM reviews_staging
+            ON CONFLICT DO NOTHING;
+            """)
+            inserted_count = self.cursor.rowcount
+            if commit:
+                self.conn.commit()
+            
+            print(f" Inserted {inserted_count} reviews")
+            return inserted_count
+            
+        except Exception as e:
+            self.conn.rollback()
+            print(f" Error copying reviews: {e}")
+            return 0
+    
     def load_data_from_csv(self, csv_path: str = "data/processed/sentiment_themes_analysis.csv") -> bool:
-        """Load data from CSV file into database"""
+        """Load data from a CSV (or Parquet snapshot) file into database"""
         print(" Loading data from CSV...")
         
         try:
-            # Read CSV
-            df = pd.read_csv(csv_path)
+            if csv_path.endswith('.parquet'):
+                # Parquet snapshots need no parsing and carry their dtypes
+                df = pd.read_parquet(csv_path, engine='pyarrow')
+                df = df[[col for col in REVIEW_DTYPES if col in df.columns]]
+            else:
+                # Read CSV
+                header = pd.read_csv(csv_path, nrows=0).columns
+                columns = [col for col in REVIEW_DTYPES if col in header]
+                df = read_csv_arrow(csv_path, columns, REVIEW_DTYPES)
             print(f" Loaded {len(df)} reviews from CSV")
             
             # Prepare banks data
@@ -152,23 +258,22 @@ class DatabaseManager:
                 for bank, app_id in banks_info.items()
             ]
             
+            # Load banks and reviews in one transaction, committed once
             # Insert banks and get bank_id mapping
-            self.insert_banks(banks_data)
-            
-            # Create bank name to ID mapping
-            self.cursor.execute("SELECT bank_id, bank_name FROM banks;")
-            bank_rows = self.cursor.fetchall()
-            bank_mapping = {name: bank_id for bank_id, name in bank_rows}
+            self.insert_banks(banks_data, commit=False)
             
-            # Convert DataFrame to list of dictionaries for reviews
-            reviews_data = df.to_dict('records')
+            # Bank name to ID mapping for every bank in the table, not just banks_info
+            bank_mapping = self.bank_ids
             
-            # Insert reviews
-            inserted = self.insert_reviews(reviews_data, bank_mapping)
+            # Bulk load reviews straight from the DataFrame columns
+            inserted = self.copy_reviews(df, bank_mapping, commit=False)
             
+            self.conn.commit()
             return inserted > 0
             
         except Exception as e:
+            if self.conn:
+                self.conn.rollback()
             print(f" Error loading data from CSV: {e}")
             return False
 
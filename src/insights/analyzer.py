@@ -9,20 +9,78 @@ and recommendations for bank app improvements.
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple
+from collections import Counter
 import json
 import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.csv_io import read_csv_arrow
+from utils.ranking import top_k_indices
+from utils.themes import build_theme_mentions
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Low-cardinality labels as categoricals: integer-code compares and groupbys
+CATEGORY_DTYPES = {'bank': 'category', 'sentiment_label': 'category'}
+
+# Columns read for the report and the visualizations sharing its frame
+INSIGHTS_DTYPES = {
+    **CATEGORY_DTYPES,
+    'rating': 'int64',
+    'sentiment_score': 'float64',
+    'identified_themes': 'string',
+    'review_text': 'string'
+}
+
+# Recommendation templates keyed by theme; rationale is formatted with the mention count
+PAIN_POINT_RECS = {
+    'TRANSACTIONS': {
+        'priority': 'HIGH',
+        'area': 'Transactions',
+        'recommendation': 'Optimize transaction processing speed and reliability',
+        'rationale': '{count} negative reviews mention transaction issues'
+    },
+    'APP_PERFORMANCE': {
+        'priority': 'HIGH',
+        'area': 'App Performance',
+        'recommendation': 'Improve app loading times and reduce crashes',
+        'rationale': '{count} negative reviews mention performance issues'
+    },
+    'RELIABILITY_ISSUES': {
+        'priority': 'HIGH',
+        'area': 'Reliability',
+        'recommendation': 'Address app crashes and error messages',
+        'rationale': '{count} negative reviews mention reliability problems'
+    }
+}
+
+DRIVER_RECS = {
+    'APP_PERFORMANCE': {
+        'priority': 'MEDIUM',
+        'area': 'Performance Maintenance',
+        'recommendation': 'Continue optimizing app performance as it is a key strength',
+        'rationale': '{count} positive reviews highlight good performance'
+    }
+}
 
 class InsightsAnalyzer:
     """Analyzes data to generate business insights and recommendations"""
     
-    def __init__(self, data_path: str = None):
+    def __init__(self, data_path: str = None, df: pd.DataFrame = None):
         """
         Initialize insights analyzer
         
         Args:
             data_path: Path to processed data CSV (if None, tries default locations)
+            df: Already loaded data to analyze instead of reading data_path
         """
-        if data_path is None:
+        if data_path is None and df is None:
             # Try multiple possible locations
             possible_paths = [
                 "data/processed/sentiment_themes_analysis.csv",
@@ -46,29 +104,109 @@ class InsightsAnalyzer:
         self.df = None
         self.insights = {}
         
+        if df is not None:
+            self.df = df.astype(CATEGORY_DTYPES)
+            self._prepare_groups()
+        
     def load_data(self) -> bool:
         """Load processed data"""
         try:
-            self.df = pd.read_csv(self.data_path)
+            self.df = read_csv_arrow(self.data_path, list(INSIGHTS_DTYPES), INSIGHTS_DTYPES)
+            self._prepare_groups()
             print(f"Loaded {len(self.df)} reviews for insights analysis")
             return True
         except Exception as e:
             print(f"Error loading data: {e}")
             return False
     
+    def _prepare_groups(self) -> None:
+        """Cache the per-bank grouping shared by all analysis methods"""
+        self._gb = self.df.groupby('bank', sort=False, observed=True)
+        self._bank_sizes = self._gb.size()
+        self._banks = list(self._bank_sizes.index)
+        self._bank_codes = self.df['bank'].cat.codes.to_numpy()
+        
+        # Sentiment flags computed once; shares and counts become bool-array reductions
+        self._pos = self.df['sentiment_label'].eq('POSITIVE').to_numpy()
+        self._neg = self.df['sentiment_label'].eq('NEGATIVE').to_numpy()
+        
+        # Per-(bank, sentiment) counts and ratings in one pass, sliced by each sentiment analysis
+        self._sentiment_stats = self.df.groupby(['bank', 'sentiment_label'], sort=False, observed=True).agg(
+            count=('rating', 'size'),
+            avg_rating=('rating', 'mean')
+        )
+        
+        # One row per (review, theme) mention, shared by all theme analyses and the visualizer
+        self.theme_mentions = build_theme_mentions(self.df)
+    
+    def _per_bank_mean(self, values) -> pd.Series:
+        """Per-bank mean of a numeric column in one bincount pass, skipping missing values"""
+        values = np.asarray(values, dtype=np.float64)
+        valid = (self._bank_codes >= 0) & ~np.isnan(values)
+        categories = self.df['bank'].cat.categories
+        
+        sums = np.bincount(self._bank_codes[valid], weights=values[valid], minlength=len(categories))
+        counts = np.bincount(self._bank_codes[valid], minlength=len(categories))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts
+        
+        return pd.Series(means, index=categories).reindex(self._banks)
+    
+    @staticmethod
+    def _theme_counts_by_bank(themes_long: pd.DataFrame) -> Dict[str, pd.Series]:
+        """Theme mention counts per bank, in order of each theme's first mention"""
+        bank_codes = themes_long['bank'].cat.codes.to_numpy()
+        theme_codes, theme_names = pd.factorize(themes_long['theme'])
+        keep = (bank_codes >= 0) & (theme_codes >= 0)
+        bank_codes, theme_codes = bank_codes[keep], theme_codes[keep]
+        
+        # (bank x theme) histogram in one bincount over flattened pair codes
+        n_banks, n_themes = len(themes_long['bank'].cat.categories), len(theme_names)
+        flat = bank_codes.astype(np.int64) * n_themes + theme_codes
+        counts = np.bincount(flat, minlength=n_banks * n_themes).reshape(n_banks, n_themes)
+        
+        # First mention of each pair orders themes, so count ties resolve as value_counts would
+        first_seen = np.full(n_banks * n_themes, len(flat), dtype=np.int64)
+        np.minimum.at(first_seen, flat, np.arange(len(flat)))
+        first_seen = first_seen.reshape(n_banks, n_themes)
+        
+        theme_counts = {}
+        for code in np.flatnonzero(counts.sum(axis=1)):
+            present = np.flatnonzero(counts[code])
+            order = present[np.argsort(first_seen[code, present], kind='stable')]
+            theme_counts[themes_long['bank'].cat.categories[code]] = pd.Series(
+                counts[code, order], index=theme_names[order])
+        
+        return theme_counts
+    
+    @staticmethod
+    def _top_counts(counts: pd.Series, k: int) -> Dict[str, int]:
+        """k largest counts, ties kept in index order, without sorting the whole Series"""
+        values = counts.to_numpy()
+        top = top_k_indices(values, k)
+        return dict(zip(counts.index[top], values[top].tolist()))
+    
     def analyze_sentiment_by_bank(self) -> Dict:
         """Analyze sentiment patterns by bank"""
         sentiment_analysis = {}
         
-        for bank in self.df['bank'].unique():
-            bank_data = self.df[self.df['bank'] == bank]
+        # One grouped pass per statistic instead of re-filtering per bank
+        total_reviews = self._bank_sizes
+        avg_rating = self._per_bank_mean(self.df['rating'].to_numpy(dtype=np.float64, na_value=np.nan))
+        avg_sentiment_score = self._per_bank_mean(
+            self.df['sentiment_score'].to_numpy(dtype=np.float64, na_value=np.nan))
+        positive_pct = self._per_bank_mean(self._pos) * 100
+        rating_counts = pd.crosstab(self.df['bank'], self.df['rating'])
+        
+        for bank in total_reviews.index:
+            bank_ratings = rating_counts.loc[bank]
             
             sentiment_analysis[bank] = {
-                'total_reviews': len(bank_data),
-                'avg_rating': bank_data['rating'].mean(),
-                'positive_pct': (bank_data['sentiment_label'] == 'POSITIVE').mean() * 100,
-                'avg_sentiment_score': bank_data['sentiment_score'].mean(),
-                'rating_distribution': bank_data['rating'].value_counts().to_dict()
+                'total_reviews': int(total_reviews[bank]),
+                'avg_rating': avg_rating[bank],
+                'positive_pct': positive_pct[bank],
+                'avg_sentiment_score': avg_sentiment_score[bank],
+                'rating_distribution': bank_ratings[bank_ratings > 0].sort_values(ascending=False).to_dict()
             }
         
         return sentiment_analysis
@@ -77,49 +215,58 @@ class InsightsAnalyzer:
         """Analyze thematic patterns by bank"""
         theme_analysis = {}
         
-        for bank in self.df['bank'].unique():
-            bank_data = self.df[self.df['bank'] == bank]
-            
-            # Extract themes from identified_themes column
-            all_themes = []
-            for themes in bank_data['identified_themes'].dropna():
-                theme_list = [t.strip() for t in str(themes).split(',') if t.strip() != 'No themes']
-                all_themes.extend(theme_list)
-            
-            theme_counts = pd.Series(all_themes).value_counts()
+        theme_counts = self._theme_counts_by_bank(self.theme_mentions)
+        empty = pd.Series(dtype='int64')
+        
+        for bank in self._banks:
+            bank_counts = theme_counts.get(bank, empty)
             
             theme_analysis[bank] = {
-                'total_theme_mentions': len(all_themes),
-                'unique_themes': len(theme_counts),
-                'top_themes': theme_counts.head(5).to_dict()
+                'total_theme_mentions': int(bank_counts.sum()),
+                'unique_themes': len(bank_counts),
+                'top_themes': self._top_counts(bank_counts, 5)
             }
         
         return theme_analysis
     
+    def _summarize_sentiment_slice(self, label: str, top_n: int = 3) -> Dict:
+        """Per-bank count, share, top themes and avg rating of reviews with a sentiment label"""
+        bank_sizes = self._bank_sizes
+        
+        stats = self._sentiment_stats
+        if label in stats.index.get_level_values('sentiment_label'):
+            stats = stats.xs(label, level='sentiment_label')
+        else:
+            stats = stats.iloc[0:0].droplevel('sentiment_label')
+        
+        theme_counts = self._theme_counts_by_bank(
+            self.theme_mentions[self.theme_mentions['sentiment_label'] == label])
+        empty = pd.Series(dtype='int64')
+        
+        summary = {}
+        for bank, count, avg_rating in stats[['count', 'avg_rating']].itertuples(name=None):
+            summary[bank] = {
+                'count': int(count),
+                'percentage': (count / bank_sizes[bank]) * 100,
+                'top_themes': self._top_counts(theme_counts.get(bank, empty), top_n),
+                'avg_rating': avg_rating
+            }
+        
+        # Keep banks in first-appearance order, including ones with no matches
+        return {bank: summary.get(bank) for bank in bank_sizes.index}
+    
     def identify_pain_points(self) -> Dict:
         """Identify key pain points for each bank"""
         pain_points = {}
         
-        for bank in self.df['bank'].unique():
-            bank_data = self.df[self.df['bank'] == bank]
-            
-            # Focus on negative reviews for pain points
-            negative_reviews = bank_data[bank_data['sentiment_label'] == 'NEGATIVE']
-            
-            if len(negative_reviews) > 0:
-                # Analyze themes in negative reviews
-                negative_themes = []
-                for themes in negative_reviews['identified_themes'].dropna():
-                    theme_list = [t.strip() for t in str(themes).split(',') if t.strip() != 'No themes']
-                    negative_themes.extend(theme_list)
-                
-                theme_counts = pd.Series(negative_themes).value_counts()
-                
+        # Focus on negative reviews for pain points
+        for bank, negative in self._summarize_sentiment_slice('NEGATIVE').items():
+            if negative:
                 pain_points[bank] = {
-                    'negative_review_count': len(negative_reviews),
-                    'negative_percentage': (len(negative_reviews) / len(bank_data)) * 100,
-                    'top_pain_points': theme_counts.head(3).to_dict(),
-                    'avg_rating_negative': negative_reviews['rating'].mean()
+                    'negative_review_count': negative['count'],
+                    'negative_percentage': negative['percentage'],
+                    'top_pain_points': negative['top_themes'],
+                    'avg_rating_negative': negative['avg_rating']
                 }
             else:
                 pain_points[bank] = {
@@ -135,26 +282,14 @@ class InsightsAnalyzer:
         """Identify key satisfaction drivers for each bank"""
         drivers = {}
         
-        for bank in self.df['bank'].unique():
-            bank_data = self.df[self.df['bank'] == bank]
-            
-            # Focus on positive reviews for drivers
-            positive_reviews = bank_data[bank_data['sentiment_label'] == 'POSITIVE']
-            
-            if len(positive_reviews) > 0:
-                # Analyze themes in positive reviews
-                positive_themes = []
-                for themes in positive_reviews['identified_themes'].dropna():
-                    theme_list = [t.strip() for t in str(themes).split(',') if t.strip() != 'No themes']
-                    positive_themes.extend(theme_list)
-                
-                theme_counts = pd.Series(positive_themes).value_counts()
-                
+        # Focus on positive reviews for drivers
+        for bank, positive in self._summarize_sentiment_slice('POSITIVE').items():
+            if positive:
                 drivers[bank] = {
-                    'positive_review_count': len(positive_reviews),
-                    'positive_percentage': (len(positive_reviews) / len(bank_data)) * 100,
-                    'top_drivers': theme_counts.head(3).to_dict(),
-                    'avg_rating_positive': positive_reviews['rating'].mean()
+                    'positive_review_count': positive['count'],
+                    'positive_percentage': positive['percentage'],
+                    'top_drivers': positive['top_themes'],
+                    'avg_rating_positive': positive['avg_rating']
                 }
             else:
                 drivers[bank] = {
@@ -166,52 +301,28 @@ class InsightsAnalyzer:
         
         return drivers
     
-    def generate_recommendations(self) -> Dict:
-        """Generate actionable recommendations for each bank"""
+    def generate_recommendations(self, sentiment_analysis: Dict = None, pain_points: Dict = None,
+                                 drivers: Dict = None) -> Dict:
+        """Generate actionable recommendations for each bank (reusing any analyses already computed)"""
         recommendations = {}
         
-        sentiment_analysis = self.analyze_sentiment_by_bank()
-        pain_points = self.identify_pain_points()
-        drivers = self.identify_drivers()
+        if sentiment_analysis is None:
+            sentiment_analysis = self.analyze_sentiment_by_bank()
+        if pain_points is None:
+            pain_points = self.identify_pain_points()
+        if drivers is None:
+            drivers = self.identify_drivers()
         
-        for bank in self.df['bank'].unique():
+        for bank in self._banks:
             bank_recs = []
             
-            # Generate recommendations based on pain points
-            if bank in pain_points and pain_points[bank]['top_pain_points']:
-                for theme, count in pain_points[bank]['top_pain_points'].items():
-                    if theme == 'TRANSACTIONS':
-                        bank_recs.append({
-                            'priority': 'HIGH',
-                            'area': 'Transactions',
-                            'recommendation': 'Optimize transaction processing speed and reliability',
-                            'rationale': f'{count} negative reviews mention transaction issues'
-                        })
-                    elif theme == 'APP_PERFORMANCE':
-                        bank_recs.append({
-                            'priority': 'HIGH',
-                            'area': 'App Performance',
-                            'recommendation': 'Improve app loading times and reduce crashes',
-                            'rationale': f'{count} negative reviews mention performance issues'
-                        })
-                    elif theme == 'RELIABILITY_ISSUES':
-                        bank_recs.append({
-                            'priority': 'HIGH',
-                            'area': 'Reliability',
-                            'recommendation': 'Address app crashes and error messages',
-                            'rationale': f'{count} negative reviews mention reliability problems'
-                        })
-            
-            # Generate recommendations based on strengths
-            if bank in drivers and drivers[bank]['top_drivers']:
-                for theme, count in drivers[bank]['top_drivers'].items():
-                    if theme == 'APP_PERFORMANCE':
-                        bank_recs.append({
-                            'priority': 'MEDIUM',
-                            'area': 'Performance Maintenance',
-                            'recommendation': 'Continue optimizing app performance as it is a key strength',
-                            'rationale': f'{count} positive reviews highlight good performance'
-                        })
+            # Generate recommendations based on pain points, then on strengths
+            for themes, templates in ((pain_points.get(bank, {}).get('top_pain_points'), PAIN_POINT_RECS),
+                                      (drivers.get(bank, {}).get('top_drivers'), DRIVER_RECS)):
+                for theme, count in (themes or {}).items():
+                    template = templates.get(theme)
+                    if template:
+                        bank_recs.append({**template, 'rationale': template['rationale'].format(count=count)})
             
             recommendations[bank] = bank_recs
         
@@ -223,39 +334,50 @@ class InsightsAnalyzer:
             if not self.load_data():
                 return {}
         
+        # Run each analysis once; recommendations build on the same results
+        sentiment_analysis = self.analyze_sentiment_by_bank()
+        pain_points = self.identify_pain_points()
+        drivers = self.identify_drivers()
+        
         report = {
             'summary_statistics': {
                 'total_reviews': len(self.df),
-                'banks_analyzed': self.df['bank'].nunique(),
-                'overall_positive_pct': (self.df['sentiment_label'] == 'POSITIVE').mean() * 100,
+                'banks_analyzed': len(self._banks),
+                'overall_positive_pct': self._pos.mean() * 100,
                 'overall_avg_rating': self.df['rating'].mean()
             },
-            'sentiment_analysis': self.analyze_sentiment_by_bank(),
+            'sentiment_analysis': sentiment_analysis,
             'theme_analysis': self.analyze_themes_by_bank(),
-            'pain_points': self.identify_pain_points(),
-            'drivers': self.identify_drivers(),
-            'recommendations': self.generate_recommendations(),
-            'ethical_considerations': self.identify_ethical_considerations()
+            'pain_points': pain_points,
+            'drivers': drivers,
+            'recommendations': self.generate_recommendations(sentiment_analysis, pain_points, drivers),
+            'ethical_considerations': self.identify_ethical_considerations(sentiment_analysis)
         }
         
         return report
     
-    def identify_ethical_considerations(self) -> List[str]:
-        """Identify potential ethical considerations and biases"""
+    def identify_ethical_considerations(self, sentiment_analysis: Dict = None) -> List[str]:
+        """Identify potential ethical considerations and biases (reusing the sentiment analysis if given)"""
         considerations = []
         
+        if sentiment_analysis is None:
+            sentiment_analysis = self.analyze_sentiment_by_bank()
+        
         # Check for review bias
-        negative_pct = (self.df['sentiment_label'] == 'NEGATIVE').mean() * 100
+        negative_pct = self._neg.mean() * 100
         if negative_pct > 70:
             considerations.append(f"High negative bias: {negative_pct:.1f}% of reviews are negative. Users more likely to review when dissatisfied.")
         
-        # Check rating distribution
-        rating_dist = self.df['rating'].value_counts(normalize=True)
-        if rating_dist.get(1, 0) > 0.4 or rating_dist.get(5, 0) > 0.4:
+        # Check rating distribution, summed from the per-bank rating counts
+        rating_counts = Counter()
+        for analysis in sentiment_analysis.values():
+            rating_counts.update(analysis['rating_distribution'])
+        total_ratings = sum(rating_counts.values()) or 1
+        if rating_counts[1] / total_ratings > 0.4 or rating_counts[5] / total_ratings > 0.4:
             considerations.append("Polarized ratings: Many 1-star and 5-star reviews suggest emotional rather than balanced feedback.")
         
         # Check sample representativeness
-        reviews_per_bank = self.df['bank'].value_counts()
+        reviews_per_bank = self._bank_sizes
         if reviews_per_bank.std() / reviews_per_bank.mean() > 0.3:
             considerations.append("Uneven sample sizes across banks may affect comparative analysis.")
         
@@ -270,8 +392,14 @@ class InsightsAnalyzer:
             # Create directory if it doesn't exist
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             
-            with open(output_path, 'w') as f:
-                json.dump(report, f, indent=2)
+            if orjson is not None:
+                # Native numpy scalars and int keys (rating distributions), no Python-level encoder
+                options = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                with open(output_path, 'wb') as f:
+                    f.write(orjson.dumps(report, option=options))
+            else:
+                with open(output_path, 'w') as f:
+                    json.dump(report, f, indent=2)
             print(f"Insights report saved to {output_path}")
             return True
         except Exception as e:
@@ -0,0 +1,42 @@
+"""
+Main Insights Pipeline
+Generates the insights report and visualizations from a single data load
+"""
+
+import os
+import sys
+import matplotlib
+
+# Figures are only written to files; skip loading a GUI backend
+matplotlib.use('Agg')
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from insights.analyzer import InsightsAnalyzer
+from insights.visualizer import DataVisualizer
+
+def main():
+    """Main execution function"""
+    analyzer = InsightsAnalyzer()
+    
+    # Read the CSV once; the visualizer plots the same frame
+    if not analyzer.load_data():
+        print("Failed to load data for insights analysis")
+        return
+    
+    report = analyzer.generate_insights_report()
+    if report:
+        analyzer.save_report(report)
+    else:
+        print("Failed to generate insights report")
+    
+    visualizer = DataVisualizer(df=analyzer.df, theme_mentions=analyzer.theme_mentions)
+    if visualizer.create_all_visualizations():
+        print("\nInsights pipeline completed successfully")
+        print("Check the 'reports/figures' directory for output files")
+    else:
+        print("Visualization generation failed")
+
+if __name__ == "__main__":
+    main()
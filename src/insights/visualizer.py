@@ -8,23 +8,69 @@ and stakeholder presentations.
 
 import pandas as pd
 import numpy as np
+import matplotlib
+if __name__ == "__main__":
+    matplotlib.use('Agg')  # Script runs only write files; skip loading a GUI backend
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
 from wordcloud import WordCloud, STOPWORDS
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from typing import Dict, List
 import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.themes import build_theme_mentions
+
+# Report figures render at DEFAULT_DPI; high_quality=True restores publication resolution
+DEFAULT_DPI = 150
+HIGH_QUALITY_DPI = 300
+
+WORDCLOUD_STOPWORDS = frozenset(STOPWORDS) | {'app', 'bank', 'please', 'thank', 'thanks', 'would', 'could', 'should'}
+WORDCLOUD_PARAMS = {
+    'width': 800,
+    'height': 400,
+    'background_color': 'white',
+    'max_words': 100,
+    'contour_width': 1,
+    'contour_color': 'steelblue'
+}
+
+def draw_word_cloud(ax, wordcloud: WordCloud, title: str) -> None:
+    """Draw a generated word cloud onto an axes with the report styling"""
+    ax.imshow(wordcloud, interpolation='bilinear')
+    ax.axis('off')
+    ax.set_title(title, fontsize=16, pad=20)
+
+def render_word_cloud(text_data: str, title: str, output_path: str,
+                      stopwords: frozenset = WORDCLOUD_STOPWORDS, dpi: int = DEFAULT_DPI) -> str:
+    """Render a word cloud straight to an image file; pyplot-free so it can run in worker processes"""
+    wordcloud = WordCloud(stopwords=stopwords, **WORDCLOUD_PARAMS).generate(text_data)
+    
+    fig = Figure(figsize=(10, 5))
+    draw_word_cloud(fig.subplots(), wordcloud, title)
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    
+    return output_path
 
 class DataVisualizer:
     """Creates professional visualizations for bank review insights"""
     
-    def __init__(self, data_path: str = None):
+    def __init__(self, data_path: str = None, df: pd.DataFrame = None,
+                 theme_mentions: pd.DataFrame = None):
         """
         Initialize insights analyzer
         
         Args:
             data_path: Path to processed data CSV (if None, tries default locations)
+            df: Already loaded data to plot instead of reading data_path
+            theme_mentions: Theme mentions already built from df (e.g. InsightsAnalyzer.theme_mentions)
         """
-        if data_path is None:
+        if data_path is None and df is None:
             # Try multiple possible locations
             possible_paths = [
                 "data/processed/sentiment_themes_analysis.csv",
@@ -45,10 +91,15 @@ class DataVisualizer:
         else:
             self.data_path = data_path
         
-        self.df = None
+        self.df = df
+        self.theme_mentions = theme_mentions
         self.insights = {}
         self.output_dir = "reports/figures"
-    
+        
+        # Word cloud settings shared by every bank: built once and reused
+        self._stopwords = WORDCLOUD_STOPWORDS
+        self._wordcloud = WordCloud(stopwords=self._stopwords, **WORDCLOUD_PARAMS)
+        self._wordcloud_fig = None
         
         # Create output directory
         os.makedirs(self.output_dir, exist_ok=True)
@@ -61,18 +112,19 @@ class DataVisualizer:
         """Load processed data"""
         try:
             self.df = pd.read_csv(self.data_path)
+            self.theme_mentions = None
             print(f"Loaded {len(self.df)} reviews for visualization")
             return True
         except Exception as e:
             print(f"Error loading data: {e}")
             return False
     
-    def plot_sentiment_comparison(self, save: bool = True) -> plt.Figure:
+    def plot_sentiment_comparison(self, save: bool = True, high_quality: bool = False) -> plt.Figure:
         """Create sentiment comparison plot across banks"""
         fig, axes = plt.subplots(1, 2, figsize=(14, 6))
         
         # Plot 1: Sentiment distribution by bank
-        sentiment_counts = pd.crosstab(self.df['bank'], self.df['sentiment_label'])
+        sentiment_counts = self.df.groupby(['bank', 'sentiment_label'], observed=True).size().unstack(fill_value=0)
         sentiment_counts.plot(kind='bar', ax=axes[0])
         axes[0].set_title('Sentiment Distribution by Bank')
         axes[0].set_xlabel('Bank')
@@ -95,12 +147,12 @@ class DataVisualizer:
         
         if save:
             output_path = os.path.join(self.output_dir, 'sentiment_comparison.png')
-            plt.savefig(output_path, dpi=300, bbox_inches='tight')
+            plt.savefig(output_path, dpi=HIGH_QUALITY_DPI if high_quality else DEFAULT_DPI, bbox_inches='tight')
             print(f"Saved sentiment comparison plot to {output_path}")
         
         return fig
     
-    def plot_rating_distribution(self, save: bool = True) -> plt.Figure:
+    def plot_rating_distribution(self, save: bool = True, high_quality: bool = False) -> plt.Figure:
         """Create rating distribution visualization"""
         fig, axes = plt.subplots(2, 2, figsize=(14, 10))
         
@@ -113,7 +165,7 @@ class DataVisualizer:
         axes[0,0].set_xticks(range(1, 6))
         
         # Plot 2: Rating distribution by bank
-        rating_by_bank = pd.crosstab(self.df['bank'], self.df['rating'])
+        rating_by_bank = self.df.groupby(['bank', 'rating'], observed=True).size().unstack(fill_value=0)
         rating_by_bank.plot(kind='bar', ax=axes[0,1], stacked=True)
         axes[0,1].set_title('Rating Distribution by Bank')
         axes[0,1].set_xlabel('Bank')
@@ -144,26 +196,17 @@ class DataVisualizer:
         
         if save:
             output_path = os.path.join(self.output_dir, 'rating_distribution.png')
-            plt.savefig(output_path, dpi=300, bbox_inches='tight')
+            plt.savefig(output_path, dpi=HIGH_QUALITY_DPI if high_quality else DEFAULT_DPI, bbox_inches='tight')
             print(f"Saved rating distribution plot to {output_path}")
         
         return fig
     
-    def plot_theme_analysis(self, save: bool = True) -> plt.Figure:
+    def plot_theme_analysis(self, save: bool = True, high_quality: bool = False) -> plt.Figure:
         """Create theme analysis visualization"""
-        # Extract themes for analysis
-        theme_data = []
-        for idx, row in self.df.iterrows():
-            if pd.notna(row['identified_themes']):
-                themes = [t.strip() for t in str(row['identified_themes']).split(',') if t.strip() != 'No themes']
-                for theme in themes:
-                    theme_data.append({
-                        'bank': row['bank'],
-                        'theme': theme,
-                        'sentiment': row['sentiment_label']
-                    })
-        
-        theme_df = pd.DataFrame(theme_data)
+        # Extract themes for analysis: one row per (review, theme) mention
+        if self.theme_mentions is None:
+            self.theme_mentions = build_theme_mentions(self.df)
+        theme_df = self.theme_mentions.rename(columns={'sentiment_label': 'sentiment'})[['bank', 'theme', 'sentiment']]
         
         if len(theme_df) == 0:
             print("No theme data available for visualization")
@@ -172,7 +215,11 @@ class DataVisualizer:
         fig, axes = plt.subplots(2, 2, figsize=(14, 10))
         
         # Plot 1: Top themes across all banks
-        top_themes = theme_df['theme'].value_counts().head(10)
+        # Integer-code counting; codes follow first appearance so ties keep that order
+        theme_codes, theme_names = pd.factorize(theme_df['theme'])
+        codes, counts = np.unique(theme_codes, return_counts=True)
+        order = np.argsort(-counts, kind='stable')[:10]
+        top_themes = pd.Series(counts[order], index=theme_names[codes[order]])
         axes[0,0].barh(range(len(top_themes)), top_themes.values)
         axes[0,0].set_yticks(range(len(top_themes)))
         axes[0,0].set_yticklabels(top_themes.index)
@@ -191,8 +238,8 @@ class DataVisualizer:
         axes[0,1].legend(title='Theme', bbox_to_anchor=(1.05, 1), loc='upper left')
         
         # Plot 3: Theme sentiment analysis
-        theme_sentiment = theme_df.groupby('theme')['sentiment'].apply(
-            lambda x: (x == 'POSITIVE').mean() * 100
+        theme_sentiment = (
+            theme_df['sentiment'].eq('POSITIVE').groupby(theme_df['theme']).mean() * 100
         ).sort_values(ascending=False)
         
         top_sentiment_themes = theme_sentiment.head(8)
@@ -224,70 +271,81 @@ class DataVisualizer:
         
         if save:
             output_path = os.path.join(self.output_dir, 'theme_analysis.png')
-            plt.savefig(output_path, dpi=300, bbox_inches='tight')
+            plt.savefig(output_path, dpi=HIGH_QUALITY_DPI if high_quality else DEFAULT_DPI, bbox_inches='tight')
             print(f"Saved theme analysis plot to {output_path}")
         
         return fig
     
-    def create_word_cloud(self, bank: str = None, save: bool = True) -> WordCloud:
-        """Create word cloud from review text"""
+    @staticmethod
+    def _word_cloud_labels(bank: str = None) -> tuple:
+        """Title and output filename for a bank's word cloud (or all banks)"""
         if bank:
-            text_data = ' '.join(self.df[self.df['bank'] == bank]['review_text'].dropna().astype(str))
-            title = f'Word Cloud - {bank}'
-            filename = f'wordcloud_{bank.lower().replace(" ", "_")}.png'
-        else:
-            text_data = ' '.join(self.df['review_text'].dropna().astype(str))
-            title = 'Word Cloud - All Banks'
-            filename = 'wordcloud_all_banks.png'
-        
-        # Add custom stopwords
-        stopwords = set(STOPWORDS)
-        stopwords.update(['app', 'bank', 'please', 'thank', 'thanks', 'would', 'could', 'should'])
+            return f'Word Cloud - {bank}', f'wordcloud_{bank.lower().replace(" ", "_")}.png'
+        return 'Word Cloud - All Banks', 'wordcloud_all_banks.png'
+    
+    def create_word_cloud(self, bank: str = None, save: bool = True, text_data: str = None,
+                          high_quality: bool = False) -> WordCloud:
+        """Create word cloud from review text (pass text_data to skip re-filtering the reviews)"""
+        if text_data is None:
+            reviews = self.df[self.df['bank'] == bank]['review_text'] if bank else self.df['review_text']
+            text_data = reviews.dropna().astype(str).str.cat(sep=' ')
+        title, filename = self._word_cloud_labels(bank)
         
         # Generate word cloud
-        wordcloud = WordCloud(
-            width=800,
-            height=400,
-            background_color='white',
-            stopwords=stopwords,
-            max_words=100,
-            contour_width=1,
-            contour_color='steelblue'
-        ).generate(text_data)
-        
-        # Plot
-        plt.figure(figsize=(10, 5))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-        plt.title(title, fontsize=16, pad=20)
+        wordcloud = self._wordcloud.generate(text_data)
+        
+        # Plot on one reused figure kept outside pyplot, so it is never registered
+        # globally and is freed with the visualizer
+        if self._wordcloud_fig is None:
+            self._wordcloud_fig = Figure(figsize=(10, 5))
+            self._wordcloud_ax = self._wordcloud_fig.subplots()
+        fig, ax = self._wordcloud_fig, self._wordcloud_ax
+        ax.cla()
+        draw_word_cloud(ax, wordcloud, title)
         
         if save:
             output_path = os.path.join(self.output_dir, filename)
-            plt.savefig(output_path, dpi=300, bbox_inches='tight')
+            fig.savefig(output_path, dpi=HIGH_QUALITY_DPI if high_quality else DEFAULT_DPI, bbox_inches='tight')
             print(f"Saved word cloud to {output_path}")
         
         return wordcloud
     
-    def create_all_visualizations(self):
-        """Create all required visualizations"""
+    def create_all_visualizations(self, high_quality: bool = False):
+        """Create all required visualizations (high_quality renders at publication resolution)"""
         print("Creating all visualizations...")
         
-        if not self.load_data():
+        if self.df is None and not self.load_data():
             print("Failed to load data for visualization")
             return False
         
         try:
             # Create all visualizations
-            self.plot_sentiment_comparison()
-            self.plot_rating_distribution()
-            self.plot_theme_analysis()
+            # Figures are only saved here, so release each one from pyplot right away
+            for plot in (self.plot_sentiment_comparison, self.plot_rating_distribution, self.plot_theme_analysis):
+                fig = plot(high_quality=high_quality)
+                if fig is not None:
+                    plt.close(fig)
+            
+            # Concatenate review text per bank in one grouped pass
+            reviews = self.df['review_text'].dropna().astype(str)
+            bank_texts = reviews.groupby(self.df['bank'], sort=False).agg(lambda s: s.str.cat(sep=' '))
+            
+            # Word clouds for each bank plus the overall one
+            jobs = [(bank_texts.get(bank, ''), bank) for bank in self.df['bank'].unique()]
+            jobs.append((reviews.str.cat(sep=' '), None))
             
-            # Create word clouds for each bank
-            for bank in self.df['bank'].unique():
-                self.create_word_cloud(bank=bank)
+            dpi = HIGH_QUALITY_DPI if high_quality else DEFAULT_DPI
+            texts, titles, output_paths = [], [], []
+            for text_data, bank in jobs:
+                title, filename = self._word_cloud_labels(bank)
+                texts.append(text_data)
+                titles.append(title)
+                output_paths.append(os.path.join(self.output_dir, filename))
             
-            # Create overall word cloud
-            self.create_word_cloud()
+            # Layout is CPU-bound and independent per cloud, so render them in parallel
+            with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as executor:
+                for output_path in executor.map(partial(render_word_cloud, dpi=dpi), texts, titles, output_paths):
+                    print(f"Saved word cloud to {output_path}")
             
             print("\nAll visualizations created successfully")
             print(f"Output directory: {self.output_dir}")
@@ -12,6 +12,7 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.text_preprocessor import TextPreprocessor
+from utils.csv_io import write_csv_arrow
 from nlp_analysis.sentiment_analyzer import SentimentAnalyzer
 from nlp_analysis.theme_analyzer import ThemeAnalyzer
 
@@ -58,9 +59,12 @@ class NLPAnalysisPipeline:
 
         # Add themes to the dataframe
         print("\n Adding themes to dataframe...")
-        df_sentiment['themes'] = df_sentiment['processed_text'].apply(self.theme_analyzer.classify_review_themes)
+        df_sentiment['themes'] = self.theme_analyzer.classify_themes(df_sentiment['processed_text'])
         print("✓ Themes added to dataframe")
 
+        # Intermediate NLP columns are consumed by now; drop them before reporting and saving
+        df_sentiment.drop(columns=['tokens', 'processed_text'], inplace=True)
+
         # Step 4: Generate reports
         print("\n Step 4: Generating Reports")
         sentiment_report = self.sentiment_analyzer.generate_sentiment_report(df_sentiment)
@@ -80,7 +84,7 @@ class NLPAnalysisPipeline:
         print("\n NLP Analysis Pipeline Completed Successfully!")
         return self.results
     
-    def save_results(self, df: pd.DataFrame, theme_analysis: dict) -> None:
+    def save_results(self, df: pd.DataFrame, theme_analysis: dict, save_backup: bool = False) -> None:
         """Save multiple CSV files matching all requirements"""
         output_dir = 'data/processed'
         os.makedirs(output_dir, exist_ok=True)
@@ -91,16 +95,21 @@ class NLPAnalysisPipeline:
             'review_text': df['review_cleaned'],
             'sentiment_label': df['sentiment_label'],
             'sentiment_score': df['sentiment_score'],
-            'identified_themes': df['themes'].apply(lambda x: ', '.join(x) if x else 'No themes'),
+            'identified_themes': df['themes'].str.join(', ').where(df['themes'].str.len() > 0, 'No themes'),
             'bank': df['bank'],
             'rating': df['rating'],
             'date': df['date']
         })
         
         main_output_path = os.path.join(output_dir, 'sentiment_themes_analysis.csv')
-        main_analysis_df.to_csv(main_output_path, index=False)
+        write_csv_arrow(main_analysis_df, main_output_path)
         print(f"✓ 1. Main analysis saved: {main_output_path}")
         
+        # Parquet copy for the database loader: reloads without parsing and keeps dtypes
+        main_parquet_path = os.path.splitext(main_output_path)[0] + '.parquet'
+        main_analysis_df.to_parquet(main_parquet_path, engine='pyarrow', index=False)
+        print(f"✓ 1. Main analysis Parquet copy: {main_parquet_path}")
+        
         # 2. Keywords extraction CSV
         keywords_data = []
         for bank, analysis in theme_analysis.items():
@@ -121,10 +130,11 @@ class NLPAnalysisPipeline:
         
         keywords_df = pd.DataFrame(keywords_data)
         keywords_output_path = os.path.join(output_dir, 'extracted_keywords.csv')
-        keywords_df.to_csv(keywords_output_path, index=False)
+        write_csv_arrow(keywords_df, keywords_output_path)
         print(f"✓ 2. Keywords extracted: {keywords_output_path}")
         
         # 3. Theme clusters per bank CSV
+        bank_sizes = df.groupby('bank').size().to_dict()
         theme_clusters_data = []
         for bank, analysis in theme_analysis.items():
             for theme, count in analysis['theme_distribution'].items():
@@ -132,18 +142,19 @@ class NLPAnalysisPipeline:
                     'bank': bank,
                     'theme': theme,
                     'review_count': count,
-                    'percentage': (count / len(df[df['bank'] == bank])) * 100
+                    'percentage': (count / bank_sizes[bank]) * 100
                 })
         
         themes_df = pd.DataFrame(theme_clusters_data)
         themes_output_path = os.path.join(output_dir, 'theme_clusters.csv')
-        themes_df.to_csv(themes_output_path, index=False)
+        write_csv_arrow(themes_df, themes_output_path)
         print(f"✓ 3. Theme clusters saved: {themes_output_path}")
         
-        # 4. Full dataset (backup)
-        full_output_path = os.path.join(output_dir, 'reviews_with_sentiment_themes.csv')
-        df.to_csv(full_output_path, index=False)
-        print(f"✓ 4. Full dataset backup: {full_output_path}")
+        # 4. Full dataset (backup) - mostly duplicates file 1, so opt-in and as Parquet (keeps list columns)
+        if save_backup:
+            full_output_path = os.path.join(output_dir, 'reviews_with_sentiment_themes.parquet')
+            df.to_parquet(full_output_path, index=False)
+            print(f"✓ 4. Full dataset backup: {full_output_path}")
 def main():
     """Main execution function"""
     try:
@@ -3,26 +3,57 @@ Professional Sentiment Analysis for Bank Reviews
 Using DistilBERT for accurate sentiment classification
 """
 
+import hashlib
+import os
+import uuid
 import pandas as pd
 import numpy as np
 from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 import torch
 
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+except ImportError:
+    ORTModelForSequenceClassification = None
+
+# Exported ONNX models are kept here so the export runs once per model
+ONNX_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "kaim_fintech_onnx")
+
+# Model predictions keyed by (model, variant, text hash) so re-runs only score new reviews.
+# Anchored at the repository root so runs from notebooks/ share the same cache; each run
+# adds its new predictions as a separate part file
+SENTIMENT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'data', 'processed', '_sentiment_cache'
+)
+
 class SentimentAnalyzer:
     """Professional sentiment analysis using DistilBERT"""
     
-    def __init__(self, model_name: str = "distilbert-base-uncased-finetuned-sst-2-english"):
+    def __init__(self, model_name: str = "distilbert-base-uncased-finetuned-sst-2-english", batch_size: int = 64,
+                 quantize: bool = True, cache_dir: str = SENTIMENT_CACHE_DIR):
         print("Initializing sentiment analyzer...")
         
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache_dir = cache_dir  # None disables the prediction cache
+        
         # Use GPU if available
         self.device = 0 if torch.cuda.is_available() else -1
         print(f"Using device: {'GPU' if self.device == 0 else 'CPU'}")
         
         try:
+            # Fast (Rust) tokenizer: batch tokenization and lengths for bucketing
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+            
+            model = self._load_model(model_name, quantize)
+            
             self.classifier = pipeline(
                 "sentiment-analysis",
-                model=model_name,
+                model=model,
+                tokenizer=self.tokenizer,
                 device=self.device,
                 truncation=True
             )
@@ -33,8 +64,63 @@ class SentimentAnalyzer:
             self.model_loaded = False
             self._setup_fallback()
     
+    def _load_model(self, model_name: str, quantize: bool):
+        """Load the classifier on ONNX Runtime if available, otherwise PyTorch"""
+        if ORTModelForSequenceClassification is not None:
+            try:
+                provider = 'CUDAExecutionProvider' if self.device == 0 else 'CPUExecutionProvider'
+                
+                # On CPU, quantize=True exports an int8 (dynamic) model; each mode has its own cache entry
+                int8 = self.device == -1 and quantize
+                export_dir = os.path.join(ONNX_CACHE_DIR, model_name.replace('/', '--') + ('-int8' if int8 else '-fp32'))
+                file_name = 'model_quantized.onnx' if int8 else 'model.onnx'
+                
+                if not os.path.exists(os.path.join(export_dir, file_name)):
+                    model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+                    if int8:
+                        quantizer = ORTQuantizer.from_pretrained(model)
+                        quantizer.quantize(
+                            save_dir=export_dir,
+                            quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+                        )
+                    else:
+                        model.save_pretrained(export_dir)
+                
+                model = ORTModelForSequenceClassification.from_pretrained(export_dir, file_name=file_name, provider=provider)
+                self.model_variant = f"onnx-{'int8' if int8 else 'fp32'}"
+                if int8:
+                    print("✓ Model quantized to int8 for CPU inference")
+                print(f"✓ Using ONNX Runtime ({provider})")
+                return model
+            except Exception as e:
+                print(f"⚠ ONNX Runtime unavailable: {e}. Using PyTorch.")
+        
+        # Half precision on GPU; int8 dynamic quantization of the Linear layers on CPU
+        model = AutoModelForSequenceClassification.from_pretrained(
+            model_name,
+            torch_dtype=torch.float16 if self.device == 0 else torch.float32
+        )
+        int8 = self.device == -1 and quantize
+        if int8:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            print("✓ Model quantized to int8 for CPU inference")
+        
+        self.model_variant = f"torch-{'int8' if int8 else 'fp16' if self.device == 0 else 'fp32'}"
+        return model
+    
     def _setup_fallback(self):
         """Setup fallback sentiment analysis"""
+        # VADER is a lexicon lookup with no POS tagging, far cheaper per review than TextBlob
+        self.vader = None
+        try:
+            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+            self.vader = SentimentIntensityAnalyzer()
+            self.use_textblob = False
+            print("✓ VADER fallback loaded")
+            return
+        except ImportError:
+            pass
+        
         try:
             from textblob import TextBlob
             self.use_textblob = True
@@ -65,6 +151,130 @@ class SentimentAnalyzer:
             print(f"Sentiment analysis error: {e}")
             return "NEUTRAL", 0.5
     
+    def analyze_texts_distilbert(self, texts: List[str]) -> Tuple[List[str], List[float]]:
+        """Analyze many texts with batched DistilBERT inference"""
+        sentiments = ['NEUTRAL'] * len(texts)
+        scores = [0.5] * len(texts)
+        
+        # Empty reviews stay neutral
+        valid = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+        if not valid:
+            return sentiments, scores
+        
+        try:
+            # Tokenize once, then bucket by token length so each batch pads only to its own longest review
+            encodings = self.tokenizer(
+                [texts[i][:512] for i in valid],  # Truncate to model limit
+                truncation=True,
+                max_length=512
+            )
+            order = np.argsort([len(ids) for ids in encodings['input_ids']], kind='stable')
+            
+            model = self.classifier.model
+            with torch.inference_mode():
+                for start in range(0, len(order), self.batch_size):
+                    bucket = order[start:start + self.batch_size]
+                    batch = self.tokenizer.pad(
+                        {key: [encodings[key][j] for j in bucket] for key in ('input_ids', 'attention_mask')},
+                        padding='longest',
+                        return_tensors='pt'
+                    ).to(model.device)
+                    
+                    probs = torch.softmax(model(**batch).logits.float(), dim=-1)  # FP32 softmax for FP16 logits
+                    best_scores, best_ids = probs.max(dim=-1)
+                    
+                    # Scatter results back to their original rows
+                    for j, label_id, score in zip(bucket, best_ids.tolist(), best_scores.tolist()):
+                        label = model.config.id2label[label_id]
+                        if label in ('POSITIVE', 'NEGATIVE'):
+                            sentiments[valid[j]], scores[valid[j]] = label, score
+        except Exception as e:
+            print(f"Batched sentiment analysis error: {e}. Retrying one review at a time.")
+            pairs = [self.analyze_sentiment_distilbert(text) for text in texts]
+            return [label for label, _ in pairs], [score for _, score in pairs]
+        
+        return sentiments, scores
+    
+    @staticmethod
+    def _text_key(text: str) -> str:
+        """Short stable hash of a review text for the prediction cache"""
+        return hashlib.blake2b(str(text).encode(), digest_size=8).hexdigest()
+    
+    def _load_cache(self) -> Dict[str, Tuple[str, float]]:
+        """Cached (label, score) predictions of this model and variant, by text hash"""
+        if not self.cache_dir or not os.path.isdir(self.cache_dir) or not os.listdir(self.cache_dir):
+            return {}
+        
+        try:
+            cache = pd.read_parquet(self.cache_dir, filters=[
+                ('model', '==', self.model_name),
+                ('variant', '==', self.model_variant)  # int8/fp16/fp32 and ONNX results differ slightly
+            ])
+        except Exception as e:
+            print(f"⚠ Could not read sentiment cache: {e}")
+            return {}
+        
+        return dict(zip(cache['key'], zip(cache['label'], cache['score'])))
+    
+    def _save_cache(self, predictions: Dict[str, Tuple[str, float]]) -> None:
+        """Write new predictions of this model and variant as a new part file"""
+        new_rows = pd.DataFrame({
+            'model': self.model_name,
+            'variant': self.model_variant,
+            'key': list(predictions),
+            'label': [label for label, _ in predictions.values()],
+            'score': [score for _, score in predictions.values()]
+        })
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            new_rows.to_parquet(os.path.join(self.cache_dir, f'part-{uuid.uuid4().hex}.parquet'), index=False)
+        except Exception as e:
+            print(f"⚠ Could not write sentiment cache: {e}")
+    
+    def _analyze_texts_cached(self, texts: List[str]) -> Tuple[List[str], List[float]]:
+        """Batched DistilBERT predictions, scoring only texts missing from the cache"""
+        if not self.cache_dir:
+            print(f"Classifying {len(texts)} texts in batches of {self.batch_size}...")
+            return self.analyze_texts_distilbert(texts)
+        
+        keys = [self._text_key(text) for text in texts]
+        cache = self._load_cache()
+        missing = [i for i, key in enumerate(keys) if key not in cache]
+        print(f"✓ {len(texts) - len(missing)} texts found in sentiment cache")
+        
+        sentiments = [cache[key][0] if key in cache else 'NEUTRAL' for key in keys]
+        scores = [cache[key][1] if key in cache else 0.5 for key in keys]
+        
+        if missing:
+            print(f"Classifying {len(missing)} texts in batches of {self.batch_size}...")
+            new_sentiments, new_scores = self.analyze_texts_distilbert([texts[i] for i in missing])
+            for i, label, score in zip(missing, new_sentiments, new_scores):
+                sentiments[i], scores[i] = label, score
+            
+            # The model only answers POSITIVE/NEGATIVE; NEUTRAL marks an empty text or a failed
+            # prediction, which is retried next run rather than cached
+            predictions = {
+                keys[i]: (label, score) for i, label, score in zip(missing, new_sentiments, new_scores)
+                if label != 'NEUTRAL'
+            }
+            if predictions:
+                self._save_cache(predictions)
+        
+        return sentiments, scores
+    
+    def analyze_sentiment_vader(self, text: str) -> Tuple[str, float]:
+        """Fallback sentiment analysis using VADER"""
+        compound = self.vader.polarity_scores(text)['compound']
+        
+        # ±0.05 are VADER's recommended cut-offs
+        if compound >= 0.05:
+            return 'POSITIVE', (compound + 1) / 2
+        elif compound <= -0.05:
+            return 'NEGATIVE', (1 - compound) / 2
+        else:
+            return 'NEUTRAL', 0.5
+    
     def analyze_sentiment_textblob(self, text: str) -> Tuple[str, float]:
         """Fallback sentiment analysis using TextBlob"""
         from textblob import TextBlob
@@ -83,25 +293,34 @@ class SentimentAnalyzer:
         """Perform sentiment analysis on entire DataFrame"""
         print("Starting sentiment analysis...")
         
+        # Classify each distinct text once; duplicates ("good", "nice app", "") reuse the result
+        codes, unique_texts = pd.factorize(df[text_column])
+        unique_texts = unique_texts.tolist()
+        print(f"{len(unique_texts)} unique texts among {len(df)} reviews")
+        
         sentiments = []
         scores = []
         
-        for idx, text in enumerate(df[text_column]):
-            if idx % 100 == 0:
-                print(f"Processed {idx}/{len(df)} reviews...")
-            
-            if self.model_loaded:
-                sentiment, score = self.analyze_sentiment_distilbert(text)
-            elif self.use_textblob:
-                sentiment, score = self.analyze_sentiment_textblob(text)
-            else:
-                sentiment, score = "NEUTRAL", 0.5
-            
-            sentiments.append(sentiment)
-            scores.append(score)
+        if self.model_loaded:
+            sentiments, scores = self._analyze_texts_cached(unique_texts)
+        else:
+            for idx, text in enumerate(unique_texts):
+                if idx % 100 == 0:
+                    print(f"Processed {idx}/{len(unique_texts)} texts...")
+                
+                if self.vader is not None:
+                    sentiment, score = self.analyze_sentiment_vader(text)
+                elif self.use_textblob:
+                    sentiment, score = self.analyze_sentiment_textblob(text)
+                else:
+                    sentiment, score = "NEUTRAL", 0.5
+                
+                sentiments.append(sentiment)
+                scores.append(score)
         
-        df['sentiment_label'] = sentiments
-        df['sentiment_score'] = scores
+        # Missing texts have code -1, which picks the trailing neutral entry
+        df['sentiment_label'] = np.array(sentiments + ['NEUTRAL'], dtype=object)[codes]
+        df['sentiment_score'] = np.array(scores + [0.5], dtype=np.float64)[codes]
         
         print("✓ Sentiment analysis completed")
         print(f"Sentiment distribution:")
@@ -5,17 +5,34 @@ Keyword extraction and theme clustering using TF-IDF and rule-based classificati
 
 import pandas as pd
 import numpy as np
+from sklearn.base import clone
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.decomposition import LatentDirichletAllocation, NMF
+from scipy import sparse
 from collections import Counter, defaultdict
+from joblib import Parallel, delayed
+import os
 import re
+import sys
 from typing import Dict, List, Tuple
 
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.parallel import PARALLEL_MIN_ROWS
+from utils.ranking import top_k_indices
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 class ThemeAnalyzer:
     """Professional thematic analysis for financial app reviews"""
     
     def __init__(self):
         self.theme_keywords = self._initialize_theme_keywords()
+        self._build_keyword_matcher()
         self.vectorizer = TfidfVectorizer(
             max_features=100,
             stop_words='english',
@@ -57,6 +74,55 @@ class ThemeAnalyzer:
             ]
         }
     
+    def _build_keyword_matcher(self) -> None:
+        """Index theme keywords for a single scan per review"""
+        self._keyword_themes = defaultdict(list)
+        for theme, keywords in self.theme_keywords.items():
+            for keyword in keywords:
+                self._keyword_themes[keyword].append(theme)
+        
+        # Keyword -> theme indicator for scoring many reviews with one matrix product
+        themes = list(self.theme_keywords)
+        self._keyword_ids = {keyword: j for j, keyword in enumerate(self._keyword_themes)}
+        self._theme_indicator = np.zeros((len(self._keyword_ids), len(themes)), dtype=np.int64)
+        for keyword, j in self._keyword_ids.items():
+            for theme in self._keyword_themes[keyword]:
+                self._theme_indicator[j, themes.index(theme)] = 1
+        
+        # Aho-Corasick finds every keyword occurrence in one linear pass over the text
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self._keyword_themes:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            print("⚠ pyahocorasick not installed. Using per-keyword substring search.")
+        
+        # Space-padded forms for the substring fallback's exact-match check, built once
+        self._padded_keywords = [(keyword, f' {keyword} ') for keyword in self._keyword_themes]
+    
+    def _keyword_weights(self, text_lower: str) -> Dict[str, int]:
+        """Weight of each keyword found in the text: 2 for an exact (space-delimited) match, else 1"""
+        weights = {}
+        
+        if self._automaton is not None:
+            last = len(text_lower) - 1
+            for end, keyword in self._automaton.iter(text_lower):
+                start = end - len(keyword) + 1
+                if ((start == 0 or text_lower[start - 1] == ' ') and
+                        (end == last or text_lower[end + 1] == ' ')):
+                    weights[keyword] = 2
+                else:
+                    weights.setdefault(keyword, 1)
+        else:
+            padded_text = f' {text_lower} '
+            for keyword, padded_keyword in self._padded_keywords:
+                if keyword in text_lower:
+                    weights[keyword] = 2 if padded_keyword in padded_text else 1
+        
+        return weights
+    
     def extract_keywords_tfidf(self, texts: List[str], top_n: int = 20) -> List[Tuple[str, float]]:
         """Extract top keywords using TF-IDF"""
         try:
@@ -65,27 +131,49 @@ class ThemeAnalyzer:
             
             # Get average TF-IDF scores across all documents
             scores = np.asarray(tfidf_matrix.mean(axis=0)).flatten()
-            keyword_scores = list(zip(feature_names, scores))
-            
-            # Sort by score and return top N
-            keyword_scores.sort(key=lambda x: x[1], reverse=True)
-            return keyword_scores[:top_n]
+            return self._top_scores(feature_names, scores, top_n)
         
         except Exception as e:
             print(f"TF-IDF extraction error: {e}")
             return []
     
+    @staticmethod
+    def _top_scores(labels: np.ndarray, scores: np.ndarray, top_n: int) -> List[Tuple[str, float]]:
+        """Top N (label, score) pairs, highest first; ties keep label order"""
+        top = top_k_indices(scores, top_n)
+        return [(labels[i], scores[i]) for i in top]
+    
     def extract_ngrams(self, texts: List[str], n: int = 2, top_n: int = 15) -> List[Tuple[str, int]]:
         """Extract common n-grams from texts"""
-        ngrams = []
+        return self._count_ngrams([text.split() for text in texts], n, top_n)
+    
+    @staticmethod
+    def _count_ngrams(token_lists: List[List[str]], n: int, top_n: int) -> List[Tuple[str, int]]:
+        """Most common n-grams over already-split texts"""
+        ngram_counts = Counter()
+        
+        for words in token_lists:
+            # zip over shifted word lists yields every window; map/join build them in C
+            ngram_counts.update(map(' '.join, zip(*[words[i:] for i in range(n)])))
+        
+        return ngram_counts.most_common(top_n)
+    
+    def _pretokenized_vectorizer(self) -> TfidfVectorizer:
+        """Unfitted copy of self.vectorizer that takes word lists split from cleaned text"""
+        stop_words = self.vectorizer.get_stop_words()
+        min_n, max_n = self.vectorizer.ngram_range
         
-        for text in texts:
-            words = text.split()
-            for i in range(len(words) - n + 1):
-                ngram = ' '.join(words[i:i + n])
-                ngrams.append(ngram)
+        def analyzer(words: List[str]) -> List[str]:
+            # Cleaned text is lowercase words and single spaces, so this matches the default
+            # analyzer: words of 2+ characters, stop words removed, then n-grams
+            words = [word for word in words if len(word) > 1 and word not in stop_words]
+            terms = []
+            for n in range(min_n, max_n + 1):
+                terms.extend(map(' '.join, zip(*[words[i:] for i in range(n)])))
+            return terms
         
-        return Counter(ngrams).most_common(top_n)
+        # The analyzer applies stop words and n-grams itself; unset them so sklearn does not warn
+        return clone(self.vectorizer).set_params(analyzer=analyzer, stop_words=None, ngram_range=(1, 1))
     
     def classify_review_themes(self, text: str, threshold: float = 0.1) -> List[str]:
         """Classify review into themes based on keyword matching"""
@@ -93,20 +181,15 @@ class ThemeAnalyzer:
             return []
         
         text_lower = text.lower()
-        theme_scores = {}
         
-        for theme, keywords in self.theme_keywords.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in text_lower:
-                    # Give more weight to exact matches and important keywords
-                    if f' {keyword} ' in f' {text_lower} ':
-                        score += 2
-                    else:
-                        score += 1
-            
-            if score > 0:
-                theme_scores[theme] = score
+        # Give more weight to exact matches and important keywords
+        theme_totals = defaultdict(int)
+        for keyword, weight in self._keyword_weights(text_lower).items():
+            for theme in self._keyword_themes[keyword]:
+                theme_totals[theme] += weight
+        
+        # Report themes in their configured order
+        theme_scores = {theme: theme_totals[theme] for theme in self.theme_keywords if theme_totals[theme] > 0}
         
         # Normalize scores and apply threshold
         if theme_scores:
@@ -117,40 +200,94 @@ class ThemeAnalyzer:
         
         return []
     
+    def classify_themes(self, texts: pd.Series, threshold: float = 0.1) -> pd.Series:
+        """Classify a whole column of reviews into themes (same rules as classify_review_themes)"""
+        lower = texts.fillna('').astype(str).str.lower()
+        
+        # Sparse (review x keyword) weight matrix from one keyword scan per review
+        rows, cols, weights = [], [], []
+        for i, text in enumerate(lower):
+            for keyword, weight in self._keyword_weights(text).items():
+                rows.append(i)
+                cols.append(self._keyword_ids[keyword])
+                weights.append(weight)
+        keyword_matrix = sparse.csr_matrix((weights, (rows, cols)), shape=(len(lower), len(self._keyword_ids)))
+        
+        # Per-theme scores for every review in one sparse matrix product
+        scores = keyword_matrix @ self._theme_indicator
+        
+        # Normalize scores and apply threshold
+        max_scores = scores.max(axis=1, keepdims=True)
+        selected = (scores > 0) & (scores / np.maximum(max_scores, 1) >= threshold)
+        
+        theme_names = np.array(list(self.theme_keywords), dtype=object)
+        return pd.Series([theme_names[row].tolist() for row in selected], index=texts.index, dtype=object)
+    
     def analyze_themes_by_bank(self, df: pd.DataFrame, text_column: str = 'processed_text') -> Dict:
         """Perform thematic analysis grouped by bank"""
         print("Starting thematic analysis by bank...")
         
-        theme_analysis = {}
+        # Split each review once; TF-IDF and the n-gram counts share the word lists
+        token_lists = [text.split() for text in df[text_column]]
         
-        for bank in df['bank'].unique():
-            print(f"\nAnalyzing themes for {bank}...")
-            bank_reviews = df[df['bank'] == bank][text_column].tolist()  
-            
-            # Extract keywords
-            keywords = self.extract_keywords_tfidf(bank_reviews)
-            bigrams = self.extract_ngrams(bank_reviews, n=2)
-            trigrams = self.extract_ngrams(bank_reviews, n=3)
-            
-            # Classify themes for each review
-            bank_df = df[df['bank'] == bank].copy()
-            bank_df['themes'] = bank_df[text_column].apply(self.classify_review_themes)
-            
-            # Count theme frequency
-            all_themes = [theme for themes in bank_df['themes'] for theme in themes]
-            theme_counts = Counter(all_themes)
-            
-            theme_analysis[bank] = {
-                'top_keywords': keywords[:10],
-                'top_bigrams': bigrams,
-                'top_trigrams': trigrams,
-                'theme_distribution': dict(theme_counts.most_common()),
-                'sample_reviews': self._get_theme_samples(bank_df)
-            }
-            
-            print(f"✓ {bank}: {len(keywords)} keywords, {len(theme_counts)} themes identified")
+        # Fit TF-IDF once over all reviews; each bank's keywords come from its own rows
+        try:
+            vectorizer = self._pretokenized_vectorizer()
+            tfidf_matrix = vectorizer.fit_transform(token_lists)
+            feature_names = vectorizer.get_feature_names_out()
+        except Exception as e:
+            print(f"TF-IDF extraction error: {e}")
+            tfidf_matrix, feature_names = None, None
+        
+        # Row positions per bank from one pass over the column, in order of first appearance
+        bank_rows = df.groupby('bank', sort=False).indices
+        banks = list(bank_rows)
+        
+        # Banks are independent, so large datasets spread them across processes
+        n_jobs = -1 if len(df) > PARALLEL_MIN_ROWS else 1
+        results = Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(self._analyze_bank)(
+                bank,
+                df.take(bank_rows[bank]),
+                [token_lists[i] for i in bank_rows[bank]],
+                text_column,
+                tfidf_matrix[bank_rows[bank]] if tfidf_matrix is not None else None,
+                feature_names
+            )
+            for bank in banks
+        )
+        
+        return dict(zip(banks, results))
+    
+    def _analyze_bank(self, bank: str, bank_df: pd.DataFrame, bank_tokens: List[List[str]],
+                      text_column: str, bank_tfidf, feature_names) -> Dict:
+        """Keywords, n-grams, themes and samples for one bank's reviews"""
+        print(f"\nAnalyzing themes for {bank}...")
         
-        return theme_analysis
+        # Extract keywords
+        keywords = []
+        if bank_tfidf is not None:
+            scores = np.asarray(bank_tfidf.mean(axis=0)).ravel()
+            keywords = self._top_scores(feature_names, scores, 20)
+        bigrams = self._count_ngrams(bank_tokens, n=2, top_n=15)
+        trigrams = self._count_ngrams(bank_tokens, n=3, top_n=15)
+        
+        # Classify themes for each review
+        bank_df['themes'] = self.classify_themes(bank_df[text_column])
+        
+        # Count theme frequency
+        all_themes = [theme for themes in bank_df['themes'] for theme in themes]
+        theme_counts = Counter(all_themes)
+        
+        print(f"✓ {bank}: {len(keywords)} keywords, {len(theme_counts)} themes identified")
+        
+        return {
+            'top_keywords': keywords[:10],
+            'top_bigrams': bigrams,
+            'top_trigrams': trigrams,
+            'theme_distribution': dict(theme_counts.most_common()),
+            'sample_reviews': self._get_theme_samples(bank_df)
+        }
     
     def _get_theme_samples(self, df: pd.DataFrame, n_samples: int = 2) -> Dict[str, List[str]]:
         """Get sample reviews for each theme"""
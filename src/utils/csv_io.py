@@ -0,0 +1,43 @@
+"""
+CSV I/O Utilities
+Fast multithreaded CSV reading backed by PyArrow
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+from typing import Dict, List
+
+def read_csv_arrow(path: str, columns: List[str], dtypes: Dict[str, str]) -> pd.DataFrame:
+    """Read selected CSV columns with PyArrow's multithreaded reader"""
+    # Force text columns to strings so values like dates are not inferred as
+    # timestamps; numeric columns are inferred and cast afterwards
+    string_columns = {
+        col: pa.string() for col in columns
+        if not pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(dtypes.get(col, 'object')))
+    }
+
+    table = pv.read_csv(
+        path,
+        parse_options=pv.ParseOptions(newlines_in_values=True),  # Reviews contain line breaks
+        convert_options=pv.ConvertOptions(
+            include_columns=columns,
+            column_types=string_columns,
+            strings_can_be_null=True  # Match pandas: empty fields are missing
+        )
+    )
+
+    # Hand strings to pandas still Arrow-backed rather than as Python objects
+    df = table.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get)
+    return df.astype({col: dtype for col, dtype in dtypes.items() if col in df.columns})
+
+def write_csv_arrow(df: pd.DataFrame, path: str) -> None:
+    """Write a DataFrame to CSV with PyArrow's multithreaded writer"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # The CSV writer expects plain columns, so decode categoricals first
+    schema = pa.schema([
+        field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+        for field in table.schema
+    ])
+    pv.write_csv(table.cast(schema), path)
@@ -0,0 +1,8 @@
+"""
+Parallelism Settings
+Shared threshold for spreading work across processes
+"""
+
+# Below this many rows, worker start-up and shipping data to the workers
+# outweigh the speedup, so work stays in the current process
+PARALLEL_MIN_ROWS = 50_000
@@ -0,0 +1,17 @@
+"""
+Ranking Utilities
+Top-k selection without sorting every value
+"""
+
+import numpy as np
+
+def top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest values, highest first; ties keep position order"""
+    values = np.asarray(values)
+    candidates = np.arange(len(values))
+    if len(values) > k:
+        # Partition to the kth largest value; only those at or above it get sorted
+        threshold = np.partition(values, -k)[-k]
+        candidates = np.flatnonzero(values >= threshold)
+    
+    return candidates[np.argsort(-values[candidates], kind='stable')[:k]]
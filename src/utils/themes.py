@@ -0,0 +1,12 @@
+"""
+Theme Table Utilities
+Long-format theme mentions built from the identified_themes column
+"""
+
+import pandas as pd
+
+def build_theme_mentions(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per (review, theme) mention with the review's bank and sentiment_label"""
+    themes = df['identified_themes'].dropna().astype(str).str.split(',').explode().str.strip()
+    mentions = df.loc[themes.index, ['bank', 'sentiment_label']].assign(theme=themes.to_numpy())
+    return mentions[mentions['theme'] != 'No themes']